@@ -54,66 +54,84 @@ genre_colors = {
 }
 
 # Assign colors to each artist based on their genre
-artist_colors = [genre_colors.get(g, '#808080') for g in genres] # Default to grey if genre not found
-
-# --- Matplotlib Plotting Setup ---
-fig, ax = plt.subplots(figsize=(12, 10))
-
-# Set background color to match the image
-fig.patch.set_facecolor('#f9f7f0')
-ax.set_facecolor('#f9f7f0')
-
-# Create a custom y-coordinate for each artist to ensure vertical spacing
-# We will just plot them sequentially along the y-axis
-y_coords = np.arange(len(artists)) * 1.0  # Adjust multiplier for more or less vertical space
-
-# Plot each artist
-for i, (artist, year, genre, color) in enumerate(zip(artists, years, genres, artist_colors)):
-    # Plot the circle marker
-    ax.plot(year, y_coords[i], 'o', color=color, markersize=8, zorder=3,
-            markeredgecolor='white', markeredgewidth=0.8) # White edge as in image
-
-    # Add artist name text
-    ax.text(year + 1.5, y_coords[i], artist,
-            ha='left', va='center', fontsize=9, color='#36454F') # Dark grey text
-
-# --- Formatting the Graph ---
-ax.set_title('Mauritian Sega Artists Timeline',
-             fontsize=20, fontweight='bold', color='#36454F', pad=25) # Darker title
-
-ax.set_xlabel('Birth/Form Yr', fontsize=14, color='#36454F', labelpad=15) # X-axis label as in image
-
-# Set X-axis ticks to match the image (1900, 1920, 1940, 1960, 1980)
-ax.set_xticks(np.arange(1900, 2001, 20))
-ax.set_xticklabels(np.arange(1900, 2001, 20), fontsize=10, color='#36454F')
-
-# Set y-axis to be invisible
-ax.yaxis.set_visible(False)
-
-# Remove all spines
-ax.spines['left'].set_visible(False)
-ax.spines['right'].set_visible(False)
-ax.spines['top'].set_visible(False)
-ax.spines['bottom'].set_color('#cccccc') # Light grey bottom spine
-
-# Add vertical grid lines
-ax.grid(axis='x', linestyle='-', color='#cccccc', alpha=0.7, zorder=0)
-
-# Adjust plot limits for better spacing
-ax.set_xlim(1895, 2000) # Extend slightly before 1900 and after last year
-ax.set_ylim(-1, len(artists)) # Adjust y-limits to fit all points comfortably
-
-# --- Custom Legend ---
-# Create a list of legend handles and labels
-legend_elements = []
-for genre, color in genre_colors.items():
-    legend_elements.append(plt.Line2D([0], [0], marker='o', color='w', label=genre,
-                                      markerfacecolor=color, markersize=10, markeredgecolor='white', markeredgewidth=0.8))
-
-# Place the legend on the right side of the plot
-ax.legend(handles=legend_elements, loc='upper left', bbox_to_anchor=(1.02, 1),
-          title="", frameon=False, fontsize=9, labelcolor='#36454F')
-
-
-plt.tight_layout(rect=[0, 0, 0.85, 1]) # Adjust layout to make space for the legend on the right
-plt.show()
\ No newline at end of file
+# Colors live in a lookup array with the default grey appended last, so unknown genres (index -1) map to grey
+genre_index = {g: i for i, g in enumerate(genre_colors)}
+color_lut = np.array(list(genre_colors.values()) + ['#808080']) # Default to grey if genre not found
+artist_colors = color_lut[np.array([genre_index.get(g, -1) for g in genres])]
+
+def plot_timeline():
+    """
+    Builds the timeline figure, saves it to timeline.pdf and shows it.
+    """
+    # --- Matplotlib Plotting Setup ---
+    fig, ax = plt.subplots(figsize=(12, 10))
+
+    # Set background color to match the image
+    fig.patch.set_facecolor('#f9f7f0')
+    ax.set_facecolor('#f9f7f0')
+
+    # Create a custom y-coordinate for each artist to ensure vertical spacing
+    # We will just plot them sequentially along the y-axis
+    y_coords = np.arange(len(artists)) * 1.0  # Adjust multiplier for more or less vertical space
+
+    # Plot all circle markers in a single call (one PathCollection instead of one Line2D per artist)
+    years_np = np.asarray(years)
+    # Markers are rasterized so saved PDF/SVG files stay small; axes and labels remain vector
+    ax.scatter(years_np, y_coords, c=artist_colors, s=64, zorder=3,
+               edgecolors='white', linewidths=0.8, # White edge as in image
+               rasterized=True)
+
+    # Adjust plot limits for better spacing
+    ax.set_xlim(1895, 2000) # Extend slightly before 1900 and after last year
+    ax.set_ylim(-1, len(artists)) # Adjust y-limits to fit all points comfortably
+
+    # Limits are fixed, so stop autoscaling from recomputing them on every text insertion
+    ax.set_autoscale_on(False)
+
+    # Add artist name text (one Text per artist, since each label is unique)
+    label_xs = years_np + 1.5
+    for x, y, artist in zip(label_xs, y_coords, artists):
+        ax.text(x, y, artist, transform=ax.transData,
+                ha='left', va='center', fontsize=9, color='#36454F') # Dark grey text
+
+    # --- Formatting the Graph ---
+    ax.set_title('Mauritian Sega Artists Timeline',
+                 fontsize=20, fontweight='bold', color='#36454F', pad=25) # Darker title
+
+    ax.set_xlabel('Birth/Form Yr', fontsize=14, color='#36454F', labelpad=15) # X-axis label as in image
+
+    # Set X-axis ticks to match the image (1900, 1920, 1940, 1960, 1980)
+    ax.set_xticks(np.arange(1900, 2001, 20))
+    ax.set_xticklabels(np.arange(1900, 2001, 20), fontsize=10, color='#36454F')
+
+    # Set y-axis to be invisible
+    ax.yaxis.set_visible(False)
+
+    # Remove all spines
+    ax.spines['left'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['top'].set_visible(False)
+    ax.spines['bottom'].set_color('#cccccc') # Light grey bottom spine
+
+    # Add vertical grid lines
+    ax.grid(axis='x', linestyle='-', color='#cccccc', alpha=0.7, zorder=0)
+
+    # --- Custom Legend ---
+    # Create a list of legend handles and labels
+    legend_elements = []
+    for genre, color in genre_colors.items():
+        legend_elements.append(plt.Line2D([0], [0], marker='o', color='w', label=genre,
+                                          markerfacecolor=color, markersize=10, markeredgecolor='white', markeredgewidth=0.8))
+
+    # Place the legend on the right side of the plot
+    ax.legend(handles=legend_elements, loc='upper left', bbox_to_anchor=(1.02, 1),
+              title="", frameon=False, fontsize=9, labelcolor='#36454F')
+
+
+    plt.tight_layout(rect=[0, 0, 0.85, 1]) # Adjust layout to make space for the legend on the right
+    fig.savefig('timeline.pdf', dpi=200, bbox_inches='tight') # dpi only affects the rasterized marker layer
+    plt.show()
+
+
+if __name__ == '__main__':
+    plot_timeline()
@@ -1,36 +1,43 @@
 import concurrent.futures
+import math
+import pandas as pd
 from tabulate import tabulate
 
-from scraper import run_scraper
+from scraper import run_scraper, get_config
 from gemini import run_gemini_processing
 from multiplatform_analysis import run_multiplatform_analysis
-from database import insert_analysis_results 
+from database import insert_analysis_results, get_existing_video_ids
+
+# Only the first rows are printed; the full result set still goes to MongoDB
+DISPLAY_ROW_LIMIT = 50
+
+def _to_frame(records):
+    """
+    Builds a DataFrame keyed by video_id. Columns are kept as object dtype so
+    values come back out as plain Python types (no numpy ints or float casts).
+    """
+    if not records:
+        return pd.DataFrame(columns=['video_id'], dtype=object)
+    return pd.DataFrame(records).astype(object).drop_duplicates('video_id', keep='last')
 
 def merge_data(raw_data, gemini_data, multi_data):
     """
     Merges the raw scraper data, gemini analysis, and multiplatform scores
     into a single list of dictionaries based on video_id.
     """
-    merged_list = []
-    
-    # Convert lists to dicts keyed by video_id for easy lookup
-    gemini_dict = {item['video_id']: item for item in gemini_data}
-    multi_dict = {item['video_id']: item for item in multi_data}
-    
-    for video in raw_data:
-        vid_id = video['video_id']
-        g_data = gemini_dict.get(vid_id, {})
-        m_data = multi_dict.get(vid_id, {})
-        
-        # Combine all fields
-        merged_entry = {
-            **video,       # Original scraper data (Title, URLs)
-            **g_data,      # Gemini data (Sentiment, Genre)
-            **m_data       # Multiplatform data (Flags, Scores)
-        }
-        merged_list.append(merged_entry)
-        
-    return merged_list
+    # Left joins keep every scraped video, even if an analysis step skipped it
+    df = (
+        pd.DataFrame(raw_data).astype(object)
+        .merge(_to_frame(gemini_data), on='video_id', how='left')   # Gemini data (Sentiment, Genre)
+        .merge(_to_frame(multi_data), on='video_id', how='left')    # Multiplatform data (Flags, Scores)
+    )
+
+    # Drop the NaN placeholders the join adds for missing matches, so those
+    # fields are simply absent (same as before) and item.get() defaults still apply
+    return [
+        {k: v for k, v in row.items() if not (isinstance(v, float) and math.isnan(v))}
+        for row in df.to_dict(orient='records')
+    ]
 
 def display_terminal_table(final_data):
     """
@@ -48,7 +55,7 @@ def display_terminal_table(final_data):
         "Gemini Conf."
     ]
     
-    for item in final_data:
+    for item in final_data[:DISPLAY_ROW_LIMIT]:
         row = [
             item.get("video_url", "N/A"),
             item.get("channel_url", "N/A"),
@@ -66,10 +73,16 @@ def display_terminal_table(final_data):
     print("="*50)
     print(tabulate(table_data, headers=headers, tablefmt="grid"))
 
+    hidden_rows = len(final_data) - len(table_data)
+    if hidden_rows > 0:
+        print(f"... {hidden_rows} more rows not shown.")
+
 def main():
     # 1. Run the Scraper (Sequential)
     print("Step 1: Fetching data from YouTube...")
-    raw_video_data = run_scraper()
+    # Optionally skip videos already in MongoDB, so re-runs only spend API quota on new uploads
+    skip_video_ids = get_existing_video_ids() if get_config().get("skip_existing_videos") else set()
+    raw_video_data = run_scraper(skip_video_ids)
     
     if not raw_video_data:
         print("No data scraped. Exiting.")
@@ -81,7 +94,9 @@ def main():
     gemini_results = []
     multiplatform_results = []
 
-    with concurrent.futures.ThreadPoolExecutor() as executor:
+    # Both analyses spend their time waiting on the network (each runs its own event loop),
+    # so threads overlap them without pickling raw_video_data into worker processes
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
         # Fork processes
         future_gemini = executor.submit(run_gemini_processing, raw_video_data)
         future_multi = executor.submit(run_multiplatform_analysis, raw_video_data)
@@ -1,7 +1,9 @@
 import os
+import concurrent.futures
 from dotenv import load_dotenv
+from pymongo import UpdateOne
 from pymongo.mongo_client import MongoClient
-from pymongo.errors import ConnectionFailure, OperationFailure
+from pymongo.errors import BulkWriteError, ConnectionFailure, OperationFailure
 
 # Load environment variables
 load_dotenv()
@@ -10,16 +12,23 @@ load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI") 
 DATABASE_NAME = "apollo"
 COLLECTION_NAME = "gemini_analysis"
+WRITE_BATCH_SIZE = 1000
+WRITE_WORKERS = 4
 
-# 1. Initialize client globally. This must be done here so all functions can access it.
-client = None
+# Fields produced by gemini.py. Rows flagged gemini_failed carry placeholder values for these,
+# which are only written when the document is new ($setOnInsert), never over a stored analysis.
+GEMINI_FAILED_KEY = "gemini_failed"
+GEMINI_FIELDS = ("sentiment_flag", "emotional_genre", "sega_genre", "gemini_confidence_score", "comment_density_rating")
+
+# 1. Client is created lazily by get_collection(), so importing this module never blocks on MongoDB.
+_client = None
 
 def connect_to_db():
     """
     Establishes and tests the MongoDB connection.
-    Updates the global 'client' variable.
+    Updates the global '_client' variable.
     """
-    global client
+    global _client
     
     if not MONGO_URI:
         print("MONGO_URI not found in environment variables. Data insertion will fail.")
@@ -27,44 +36,101 @@ def connect_to_db():
 
     try:
         # Set a server selection timeout to avoid long hangs
-        client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
+        _client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
         
         # Attempt to ping the server to verify the connection
-        client.admin.command('ping')
+        _client.admin.command('ping')
         print("Successfully connected to MongoDB Atlas!")
         
+        # Unique index on video_id so re-runs update existing records instead of duplicating them
+        try:
+            _client[DATABASE_NAME][COLLECTION_NAME].create_index("video_id", unique=True)
+        except OperationFailure as e:
+            print(f"Could not create unique index on video_id (existing duplicates?): {e}")
+        
     except ConnectionFailure:
         print("Failed to connect to MongoDB Atlas: Connection timed out or URI might be incorrect.")
-        client = None
+        _client = None
     except Exception as e:
         print(f"An unexpected error occurred during connection: {e}")
-        client = None
+        _client = None
 
-# 2. Define the insertion function (Guaranteed to be defined for import)
-def insert_analysis_results(results):
+def get_collection():
     """
-    Inserts a list of dictionary results into the gemini_analysis collection.
+    Returns the gemini_analysis collection, connecting on first use.
+    Returns None if the connection could not be established.
     """
-    if client is None:
-        print("Database client is not initialized. Cannot insert data.")
-        return 0
+    if _client is None:
+        connect_to_db()
+    if _client is None:
+        return None
+    return _client[DATABASE_NAME][COLLECTION_NAME]
 
-    db = client[DATABASE_NAME]
-    collection = db[COLLECTION_NAME]
-    
+def get_existing_video_ids():
+    """
+    Returns the set of video_ids already stored in the collection
+    (empty if the database is unavailable).
+    """
+    collection = get_collection()
+    if collection is None:
+        return set()
     try:
-        # insert_many handles the list of dictionaries
-        insert_result = collection.insert_many(results)
-        print(f"Successfully inserted {len(insert_result.inserted_ids)} documents.")
-        return len(insert_result.inserted_ids)
-        
+        return set(collection.distinct("video_id"))
+    except Exception as e:
+        print(f"Error reading existing video IDs: {e}")
+        return set()
+
+def _upsert_op(doc):
+    """
+    Builds the upsert for one result, keyed on video_id.
+    """
+    if not doc.get(GEMINI_FAILED_KEY):
+        return UpdateOne({"video_id": doc["video_id"]}, {"$set": doc}, upsert=True)
+
+    fields = {k: v for k, v in doc.items() if k != GEMINI_FAILED_KEY}
+    placeholders = {k: fields.pop(k) for k in GEMINI_FIELDS if k in fields}
+    return UpdateOne({"video_id": doc["video_id"]}, {"$set": fields, "$setOnInsert": placeholders}, upsert=True)
+
+def _write_batch(collection, batch, start):
+    """
+    Upserts one batch of results and returns how many documents were saved.
+    Errors are contained to the batch so the other batches still get written.
+    """
+    ops = [_upsert_op(doc) for doc in batch]
+
+    try:
+        # ordered=False lets the server keep writing the rest of a batch when a single document is rejected
+        write_result = collection.bulk_write(ops, ordered=False)
+        # Matched (existing, possibly unchanged) + newly created documents
+        return write_result.matched_count + write_result.upserted_count
+
+    except BulkWriteError as e:
+        print(f"MongoDB Bulk Write Error: {len(e.details.get('writeErrors', []))} documents rejected in batch starting at {start}.")
+        return e.details.get("nMatched", 0) + e.details.get("nUpserted", 0)
     except OperationFailure as e:
-        print(f"MongoDB Operation Error (e.g., schema validation failed): {e}")
+        print(f"MongoDB Operation Error (e.g., schema validation failed) in batch starting at {start}: {e}")
         return 0
     except Exception as e:
-        print(f"Error inserting documents: {e}")
+        print(f"Error inserting documents in batch starting at {start}: {e}")
         return 0
 
-# 3. Call the connection function immediately when the module is loaded
-# This ensures connection happens upon import, but the function definition above is safe.
-connect_to_db()
\ No newline at end of file
+# 2. Define the insertion function (Guaranteed to be defined for import)
+def insert_analysis_results(results):
+    """
+    Upserts a list of dictionary results into the gemini_analysis collection,
+    keyed on video_id, so running the pipeline twice does not duplicate records.
+    """
+    collection = get_collection()
+    if collection is None:
+        print("Database client is not initialized. Cannot insert data.")
+        return 0
+    
+    # Fixed-size batches are flushed in parallel; MongoClient is thread-safe and pools connections
+    starts = range(0, len(results), WRITE_BATCH_SIZE)
+    batches = [results[i:i + WRITE_BATCH_SIZE] for i in starts]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=WRITE_WORKERS) as executor:
+        saved = sum(executor.map(_write_batch, [collection] * len(batches), batches, starts))
+
+    print(f"Successfully saved {saved} documents.")
+    return saved
@@ -1,21 +1,47 @@
-import requests
-import json
+import asyncio
+import aiohttp
+from aiolimiter import AsyncLimiter
+import orjson
 import os
-import time
+import re
+from collections import defaultdict
 
 # --- Configuration ---
 OUTPUT_FILE = "deezer_analysis_results.json"
 
+# Deezer allows 50 requests per 5 seconds; the semaphore only bounds how many are in flight
+MAX_CONCURRENT_REQUESTS = 8
+RATE_LIMIT_REQUESTS = 50
+RATE_LIMIT_PERIOD = 5
+
+# Per-request timeout and retry policy for transient Deezer errors
+REQUEST_TIMEOUT = 5
+MAX_RETRIES = 2
+RETRY_BACKOFF = 0.3
+RETRY_STATUSES = {429, 502, 503}
+# Deezer reports an exceeded quota as HTTP 200 with {"error": {"code": 4, ...}}
+QUOTA_ERROR_CODE = 4
+
+# Returned by search_track when the search itself failed, so it isn't reported as "not found"
+_SEARCH_FAILED = object()
+
+# Titles matching these keywords are compilations/promos rather than single tracks, so we skip searching them
+_SKIP_RE = re.compile(r'\b(?:mix|compilation|playlist|live|promo|shorts|teaser)\b', re.IGNORECASE)
+
 # --- Deezer API Functions ---
 
-def search_track(song_title, channel_name):
+def _clean_title(song_title):
+    """Clean the title (e.g., removing text in parentheses)"""
+    return (song_title or "").split("(")[0].strip()
+
+async def search_track(session, limiter, song_title, channel_name):
     """
     Searches for a track on Deezer by combining the video title and channel name.
+    Every attempt, retries included, waits for a slot from the shared rate limiter.
     """
     base_url = "https://api.deezer.com/search/track"
     
-    # Clean the title (e.g., removing text in parentheses)
-    clean_title = song_title.split("(")[0].strip()
+    clean_title = _clean_title(song_title)
     
     # Combine title and channel name for a more targeted search query (e.g., "title artist")
     search_query = f"{clean_title} {channel_name}" # <-- USING CHANNEL NAME
@@ -24,7 +50,24 @@ def search_track(song_title, channel_name):
     params = {"q": search_query, "limit": 1}
     
     try:
-        response = requests.get(base_url, params=params).json()
+        # Retry rate-limit (HTTP or quota payload) and gateway errors with exponential backoff (0.3s, 0.6s, ...)
+        for attempt in range(MAX_RETRIES + 1):
+            await limiter.acquire()
+            async with session.get(base_url, params=params) as r:
+                if r.status in RETRY_STATUSES and attempt < MAX_RETRIES:
+                    await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+                    continue
+                r.raise_for_status()
+                response = await r.json(content_type=None, loads=orjson.loads)
+            error = response.get("error")
+            if error and error.get("code") == QUOTA_ERROR_CODE and attempt < MAX_RETRIES:
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+                continue
+            break
+        
+        if error:
+            print(f"Deezer API error for '{search_query}': {error}")
+            return _SEARCH_FAILED
         
         if response.get("data"):
             track = response["data"][0]  # best match
@@ -41,11 +84,37 @@ def search_track(song_title, channel_name):
             return None
     except Exception as e:
         print(f"Error searching Deezer for '{search_query}': {e}")
-        return None
+        return _SEARCH_FAILED
 
-def run_deezer_analysis(video_data_list):
+async def _search_with_limit(session, semaphore, limiter, title, channel_name):
     """
-    Main function called by app.py.
+    Runs one search while holding a semaphore slot.
+    """
+    async with semaphore:
+        return await search_track(session, limiter, title, channel_name)
+
+async def _search_all(queries):
+    """
+    Searches Deezer for every (clean_title, channel_name) query concurrently over a single HTTP session.
+    Returns a dict mapping each query to its track info (or None).
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    # One slot every RATE_LIMIT_PERIOD / RATE_LIMIT_REQUESTS seconds (10/s): never more than 50 in any 5 s, no initial burst
+    limiter = AsyncLimiter(1, RATE_LIMIT_PERIOD / RATE_LIMIT_REQUESTS)
+
+    # One keep-alive connection pool sized to the concurrency limit, so TLS handshakes are reused across searches
+    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT_REQUESTS)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        tasks = [
+            _search_with_limit(session, semaphore, limiter, clean_title, channel_name)
+            for clean_title, channel_name in queries
+        ]
+        return dict(zip(queries, await asyncio.gather(*tasks)))
+
+async def run_deezer_analysis_async(video_data_list):
+    """
+    Main coroutine, awaited by multiplatform_analysis.py alongside Spotify.
     Takes a list of video dicts (from scraper), finds them on Deezer,
     and saves the results to a JSON file.
     """
@@ -53,19 +122,32 @@ def run_deezer_analysis(video_data_list):
 
     deezer_results = []
     
-    # We use a rate-limiting sleep here to be polite to the Deezer API
-    SLEEP_TIME = 0.5 
-
+    # Filter out obvious non-track titles before spending any requests on them
+    searchable_videos = []
     for video in video_data_list:
+        if _SKIP_RE.search(video.get("title") or ""):
+            print(f"Skipping Deezer search for non-track title: '{video.get('title')}'")
+        else:
+            searchable_videos.append(video)
+
+    # Videos with the same cleaned title and channel (reposts, re-uploads) share a single search
+    groups = defaultdict(list)
+    for video in searchable_videos:
+        groups[(_clean_title(video.get("title")), video.get("channel_name", ""))].append(video)
+
+    # All searches run concurrently; results are reported once they are all back
+    track_by_query = await _search_all(list(groups))
+
+    for video in searchable_videos:
         title = video.get("title")
         channel_name = video.get("channel_name", "") # <-- EXTRACTING CHANNEL NAME
         
         print(f"Searching Deezer for: '{title}' by '{channel_name}'...")
+        track_info = track_by_query[(_clean_title(title), channel_name)]
 
-        # --- UPDATED CALL: Pass both title and channel_name ---
-        track_info = search_track(title, channel_name)
-        
-        if track_info:
+        if track_info is _SEARCH_FAILED:
+            print(f" -> Deezer search failed (see error above).")
+        elif track_info:
             # Combine the YouTube video details with the Deezer Data
             combined_entry = {
                 "youtube_video_id": video.get("video_id"),
@@ -77,19 +159,24 @@ def run_deezer_analysis(video_data_list):
             print(f" -> Found: {track_info['name']} by {track_info['artist']} (Rank: {track_info['rank']})")
         else:
             print(f" -> Not found on Deezer.")
-            
-        time.sleep(SLEEP_TIME)
 
     # Save to JSON as requested
     try:
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            json.dump(deezer_results, f, indent=4, ensure_ascii=False)
+        # orjson writes UTF-8 bytes directly (non-ASCII titles are kept as-is)
+        with open(OUTPUT_FILE, "wb") as f:
+            f.write(orjson.dumps(deezer_results, option=orjson.OPT_INDENT_2))
         print(f"\nDeezer analysis saved to {OUTPUT_FILE}")
     except Exception as e:
         print(f"Error saving Deezer results to JSON: {e}")
 
     return deezer_results
 
+def run_deezer_analysis(video_data_list):
+    """
+    Synchronous wrapper around run_deezer_analysis_async.
+    """
+    return asyncio.run(run_deezer_analysis_async(video_data_list))
+
 if __name__ == "__main__":
     # This block is for standalone testing of deezer.py
     print("Running Deezer analysis standalone test...")
@@ -1,9 +1,12 @@
 import os
-import json
-import time
+import asyncio
+from typing import Literal
+from aiolimiter import AsyncLimiter
 from dotenv import load_dotenv
 from google import genai
-from tqdm import tqdm
+from google.genai import errors
+from pydantic import BaseModel
+from tqdm.asyncio import tqdm
 
 load_dotenv()
 GEMINI_KEY = os.getenv("GEMINI_API_KEY")
@@ -13,12 +16,25 @@ if not GEMINI_KEY:
 
 client = genai.Client(api_key=GEMINI_KEY)
 
-def analyze_single_video(video_id, title, comments):
+# Gemini free tier allows 15 requests per minute
+REQUESTS_PER_MINUTE = 15
+# Rate-limited (429 / RESOURCE_EXHAUSTED) calls are retried with exponential backoff before falling back
+MAX_RETRIES = 3
+RETRY_BACKOFF = 60 / REQUESTS_PER_MINUTE
+
+class VideoAnalysis(BaseModel):
     """
-    Sends a single video's data to Gemini for sentiment/genre analysis and 
-    confidence scoring.
+    Structured output schema for Gemini, validated by the SDK before we see it.
     """
-    prompt = f"""
+    video_id: str
+    sentiment_flag: int
+    emotional_genre: str
+    sega_genre: str
+    gemini_confidence_score: float
+    comment_density_rating: Literal["Low", "Medium", "High"]
+
+# Static prompt text, filled in per video with str.format (literal JSON braces are doubled)
+_PROMPT_TEMPLATE = """
     You are an expert cultural analyst of Mauritian Sega music.
     
     Video Title: "{title}"
@@ -49,33 +65,46 @@ def analyze_single_video(video_id, title, comments):
     }}
     """
 
+def _is_rate_limited(error):
+    """True if Gemini rejected the call because the request quota is used up."""
+    return error.code == 429 or error.status == "RESOURCE_EXHAUSTED"
+
+async def _generate_with_retry(prompt, limiter):
+    """
+    Calls Gemini once a rate limiter slot is free. When the quota is exhausted anyway,
+    waits and retries (taking a new slot each time) instead of giving up on the video.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        async with limiter:
+            try:
+                return await client.aio.models.generate_content(
+                    model="gemini-2.0-flash", 
+                    contents=prompt,
+                    config={
+                        "response_mime_type": "application/json",
+                        "response_schema": VideoAnalysis
+                    }
+                )
+            except errors.APIError as e:
+                if attempt == MAX_RETRIES or not _is_rate_limited(e):
+                    raise
+        await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+async def analyze_single_video(video_id, title, comments, limiter):
+    """
+    Sends a single video's data to Gemini for sentiment/genre analysis and 
+    confidence scoring.
+    """
+    prompt = _PROMPT_TEMPLATE.format(video_id=video_id, title=title, comments=comments)
+
     try:
-        response = client.models.generate_content(
-            model="gemini-2.0-flash", 
-            contents=prompt,
-            config={
-                "response_mime_type": "application/json"
-            }
-        )
+        response = await _generate_with_retry(prompt, limiter)
         
-        # Parse the JSON string
-        data = json.loads(response.text)
+        # The SDK parses the response into a VideoAnalysis (None if it did not match the schema)
+        if response.parsed is None:
+            raise ValueError("Response did not match the VideoAnalysis schema")
+        data = response.parsed.model_dump()
 
-        # Handle case where Gemini returned a list [ {...} ] instead of a dict {...}
-        if isinstance(data, list):
-            if len(data) > 0:
-                return data[0]
-            # If list is empty, return error structure with new fields
-            else:
-                return { 
-                    "video_id": video_id,
-                    "sentiment_flag": 0,
-                    "emotional_genre": "Error",
-                    "sega_genre": "Not Sega", # Fallback for error handling
-                    "gemini_confidence_score": 0.0,
-                    "comment_density_rating": "Low"
-                }
-        
         # Check if the required keys exist before returning
         if data.get("sega_genre") == "Unknown" or not data.get("sega_genre"):
             # This is an extra safety check in case the model ignores the prompt
@@ -92,29 +121,31 @@ def analyze_single_video(video_id, title, comments):
             "emotional_genre": "Error",
             "sega_genre": "Not Sega", # Use "Not Sega" as the default genre for hard crashes
             "gemini_confidence_score": 0.0,
-            "comment_density_rating": "Low"
+            "comment_density_rating": "Low",
+            "gemini_failed": True # Marks these as placeholders so database.py won't overwrite a stored analysis with them
         }
 
+async def _analyze_all(scraped_data):
+    """
+    Runs all analyses concurrently, throttled to REQUESTS_PER_MINUTE.
+    Results are returned in the same order as scraped_data.
+    """
+    # A bucket of size 1 refilled every 60 / REQUESTS_PER_MINUTE seconds: evenly spaced calls, no initial burst
+    limiter = AsyncLimiter(1, 60 / REQUESTS_PER_MINUTE)
+    tasks = [
+        analyze_single_video(video["video_id"], video["title"], video["comments"], limiter)
+        for video in scraped_data
+    ]
+    
+    # Using tqdm to show a progress bar for the analysis phase
+    return await tqdm.gather(*tasks, desc="Analyzing Sentiment")
+
 def run_gemini_processing(scraped_data):
     """
     Iterates through the list of scraped data and applies Gemini analysis.
     """
     print(f"\n--- Starting Gemini Analysis on {len(scraped_data)} videos ---")
     
-    final_results = []
-    
-    # Using tqdm to show a progress bar for the analysis phase
-    for video in tqdm(scraped_data, desc="Analyzing Sentiment"):
-        analysis = analyze_single_video(
-            video["video_id"], 
-            video["title"], 
-            video["comments"]
-        )
-        
-        # Combine original data with analysis if needed, or just store analysis
-        final_results.append(analysis)
-        
-        # Sleep to avoid hitting Gemini rate limits (15 requests per minute on free tier)
-        time.sleep(4) 
+    final_results = asyncio.run(_analyze_all(scraped_data))
         
     return final_results
\ No newline at end of file
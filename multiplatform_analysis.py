@@ -1,83 +1,106 @@
-import math
-import time
-import concurrent.futures # --- Added for parallelism
-from spotify import run_spotify_analysis
-from deezer import run_deezer_analysis 
+import asyncio # --- Added for concurrency
+from dataclasses import dataclass
+import numpy as np
+from spotify import run_spotify_analysis_async
+from deezer import run_deezer_analysis_async 
 
-def calculate_popularity_score(youtube_views, streaming_count):
+@dataclass(slots=True)
+class PopularityRecord:
+    """
+    Popularity result for one video. Slotted to keep per-record memory small;
+    convert with dataclasses.asdict only when serializing.
+    """
+    video_id: str
+    youtube_views: str # Raw view count as scraped
+    streaming_count_used: int
+    streaming_platform_used: str
+    normalized_score: float
+    popularity_flag: int
+
+def _parse_views(youtube_views):
+    """Returns the view count as an int, or None if it isn't a valid integer."""
     try:
-        views = int(youtube_views)
-        streams = int(streaming_count)
+        return int(youtube_views)
     except ValueError:
-        return 0.0
+        return None
 
-    if views == 0 and streams == 0:
-        return 1.0 
-    if views == 0 or streams == 0:
-        return 0.0 
-        
-    score = min(views, streams) / max(views, streams)
-    return score
+def score_popularity_batch(raw_video_data, spotify_by_id, deezer_by_id):
+    """
+    Scores the popularity of a whole list of videos at once.
+    The best streaming count is the larger of Spotify (popularity 0-100, approximated as
+    * 1,000,000 streams) and Deezer rank; the score is min(views, streams) / max(views, streams),
+    1.0 if both are 0 and 0.0 if only one is (or the view count is invalid). Flag = score >= 0.5.
+    Scores are computed on NumPy arrays; records are only built at the end.
+    """
+    video_ids = [video["video_id"] for video in raw_video_data]
+    youtube_views = [video.get("views", "0") for video in raw_video_data]
 
-def get_best_streaming_count(spotify_data, deezer_data):
-    # Spotify popularity is 0-100, we approximate streams by * 1,000,000 for weighting
-    spotify_count = int(spotify_data.get("popularity", 0)) * 1000000 
-    deezer_count = int(deezer_data.get("rank", 0)) 
-    
-    if spotify_count > 0 and deezer_count > 0:
-        return max(spotify_count, deezer_count), "Combined"
-    elif spotify_count > 0:
-        return spotify_count, "Spotify"
-    elif deezer_count > 0:
-        return deezer_count, "Deezer"
-    else:
-        return 0, "None"
+    parsed_views = [_parse_views(v) for v in youtube_views]
+    views_valid = np.array([v is not None for v in parsed_views], dtype=bool)
+    views = np.array([v or 0 for v in parsed_views], dtype=np.int64)
 
-def process_single_video_popularity(video, spotify_results, deezer_results):
-    video_id = video["video_id"]
-    youtube_views = video.get("views", "0")
+    # Spotify popularity (0-100) * 1,000,000 vs Deezer rank
+    spotify_counts = np.array([int(spotify_by_id.get(vid, {}).get("popularity", 0)) for vid in video_ids], dtype=np.int64) * 1000000
+    deezer_counts = np.array([int(deezer_by_id.get(vid, {}).get("rank", 0)) for vid in video_ids], dtype=np.int64)
 
-    spotify_match = next((item for item in spotify_results if item['youtube_video_id'] == video_id), None)
-    deezer_match = next((item for item in deezer_results if item['youtube_video_id'] == video_id), None)
-    
-    spotify_data = spotify_match['spotify_data'] if spotify_match else {}
-    deezer_data = deezer_match['deezer_data'] if deezer_match else {}
+    has_spotify = spotify_counts > 0
+    has_deezer = deezer_counts > 0
+    streams = np.select(
+        [has_spotify & has_deezer, has_spotify, has_deezer],
+        [np.maximum(spotify_counts, deezer_counts), spotify_counts, deezer_counts],
+        default=0
+    )
+    platforms = np.select(
+        [has_spotify & has_deezer, has_spotify, has_deezer],
+        ["Combined", "Spotify", "Deezer"],
+        default="None"
+    )
 
-    best_streams, platform_used = get_best_streaming_count(spotify_data, deezer_data)
-    normalized_score = calculate_popularity_score(youtube_views, best_streams)
-    final_score_flag = 1 if normalized_score >= 0.5 else 0
-    
-    return {
-        "video_id": video_id,
-        "youtube_views": youtube_views,
-        "streaming_count_used": best_streams,
-        "streaming_platform_used": platform_used,
-        "normalized_score": round(normalized_score, 4),
-        "popularity_flag": final_score_flag
-    }
+    # min/max ratio, 1.0 if both are 0, 0.0 if only one is
+    lo = np.minimum(views, streams).astype(np.float64)
+    hi = np.maximum(views, streams).astype(np.float64)
+    ratio = np.divide(lo, hi, out=np.zeros_like(lo), where=hi != 0)
+    views_zero = views == 0
+    streams_zero = streams == 0
+    scores = np.select(
+        [~views_valid, views_zero & streams_zero, views_zero | streams_zero],
+        [0.0, 1.0, 0.0],
+        default=ratio
+    )
+    flags = (scores >= 0.5).astype(np.int64)
+
+    return [
+        PopularityRecord(video_id, views_raw, best_streams, platform_used, round(score, 4), flag)
+        for video_id, views_raw, best_streams, platform_used, score, flag in zip(
+            video_ids, youtube_views, streams.tolist(), platforms.tolist(), scores.tolist(), flags.tolist()
+        )
+    ]
+
+async def _gather_platforms(raw_video_data):
+    """
+    Runs the Spotify and Deezer analyses concurrently on one event loop.
+    """
+    return await asyncio.gather(
+        run_spotify_analysis_async(raw_video_data),
+        run_deezer_analysis_async(raw_video_data)
+    )
 
 def run_multiplatform_analysis(raw_video_data):
     """
     Orchestrates Spotify/Deezer analysis in PARALLEL and calculates scores.
     """
-    print("\n--- Starting Multiplatform Analysis (Forking Processes) ---")
+    print("\n--- Starting Multiplatform Analysis (Concurrent Requests) ---")
 
-    # --- FORK PROCESSES HERE ---
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        # Submit both tasks to run simultaneously
-        future_spotify = executor.submit(run_spotify_analysis, raw_video_data)
-        future_deezer = executor.submit(run_deezer_analysis, raw_video_data)
-        
-        # Wait for results
-        spotify_results = future_spotify.result()
-        deezer_results = future_deezer.result()
+    # Both platforms' searches share one event loop, so their requests overlap
+    spotify_results, deezer_results = asyncio.run(_gather_platforms(raw_video_data))
     
+    # Index platform results by YouTube video id for O(1) lookups per video
+    spotify_by_id = {r['youtube_video_id']: r['spotify_data'] for r in spotify_results}
+    deezer_by_id = {r['youtube_video_id']: r['deezer_data'] for r in deezer_results}
+
     # Merge results
-    final_popularity_data = []
     print("\nCalculating Final Popularity Scores...")
-    for video in raw_video_data:
-        score_data = process_single_video_popularity(video, spotify_results, deezer_results)
-        final_popularity_data.append(score_data)
+    final_popularity_data = score_popularity_batch(raw_video_data, spotify_by_id, deezer_by_id)
 
     print(f"Calculated scores for {len(final_popularity_data)} videos.")
     return final_popularity_data
\ No newline at end of file
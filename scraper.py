@@ -1,7 +1,12 @@
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 import yaml
+import orjson
 import time
+import concurrent.futures
+import functools
 from tqdm import tqdm
 from dotenv import load_dotenv
 
@@ -9,9 +14,40 @@ from dotenv import load_dotenv
 load_dotenv()
 API_KEY = os.getenv("YOUTUBE_API_KEY")
 
+# Comment requests are pure network I/O, so we run several at once
+COMMENT_WORKERS = 10
+# Retries (with exponential backoff) when YouTube rejects a comment request with a rate-limit 403
+MAX_RETRIES = 3
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+# videos.list accepts at most 50 IDs per request
+VIDEOS_BATCH_SIZE = 50
+# Default number of 100-comment pages fetched per video (overridable with max_comment_pages in config.yml)
+MAX_COMMENT_PAGES = 1
+
+COMMENTS_API_URL = "https://www.googleapis.com/youtube/v3/commentThreads"
+# Flattens comments onto one line (newlines become spaces, carriage returns are dropped) in a single pass
+_NL_TABLE = str.maketrans({"\n": " ", "\r": None})
+
+# One keep-alive session for all YouTube API calls, so TLS connections are reused across requests.
+# Response bodies are decoded with orjson (comment pages can be a few hundred kB).
+# Transient server errors and 429s are retried by the adapter; the final response is returned either way.
+REQUEST_TIMEOUT = 10
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=20, pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+))
+
+# libyaml's C loader when PyYAML was built with it, otherwise the pure-Python one
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+@functools.lru_cache(maxsize=1)
 def get_config():
+    """
+    Parses config.yml once per process; later calls return the same dict (treat it as read-only).
+    """
     with open("config.yml", "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=_YAML_LOADER)
 
 def get_video_stats_and_details(video_ids):
     """
@@ -29,15 +65,54 @@ def get_video_stats_and_details(video_ids):
     }
     
     try:
-        r = requests.get(VIDEOS_API_URL, params=params).json()
+        r = orjson.loads(SESSION.get(VIDEOS_API_URL, params=params, timeout=REQUEST_TIMEOUT).content)
         return r.get("items", [])
     except Exception as e:
         print(f"Error fetching video stats: {e}")
         return []
 
-def get_comments(video_id):
-    """Fetches top 100 comments for a specific video ID"""
-    COMMENTS_API_URL = "https://www.googleapis.com/youtube/v3/commentThreads"
+def _is_rate_limited(response):
+    """
+    True for a 403 whose error reason is a rate limit (other 403s, like disabled
+    comments, are not worth retrying). 429s are already retried by SESSION's adapter.
+    """
+    if response.status_code == 403:
+        errors = orjson.loads(response.content).get("error", {}).get("errors", [])
+        return any(e.get("reason") in RATE_LIMIT_REASONS for e in errors)
+    return False
+
+def iter_playlist_pages(playlist_id):
+    """
+    Yields the video IDs of a playlist one page (up to 50 IDs) at a time, following nextPageToken.
+    Each page's token comes from the previous page, so pages are read in order; yielding them
+    lets the caller start work on a page while the next one is being fetched.
+    """
+    PLAYLIST_API_URL = "https://www.googleapis.com/youtube/v3/playlistItems"
+    params = {
+        "key": API_KEY, "part": "snippet", "playlistId": playlist_id, "maxResults": VIDEOS_BATCH_SIZE
+    }
+    
+    while True:
+        r = orjson.loads(SESSION.get(PLAYLIST_API_URL, params=params, timeout=REQUEST_TIMEOUT).content)
+        yield [item["snippet"]["resourceId"]["videoId"] for item in r.get("items", [])]
+        
+        if not r.get("nextPageToken"):
+            return
+        params["pageToken"] = r["nextPageToken"]
+
+def _get_comments_page(params):
+    """
+    Fetches one commentThreads page, backing off and retrying when rate-limited.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        response = SESSION.get(COMMENTS_API_URL, params=params, timeout=REQUEST_TIMEOUT)
+        if attempt < MAX_RETRIES and _is_rate_limited(response):
+            time.sleep(2 ** attempt)
+            continue
+        return orjson.loads(response.content)
+
+def get_comments(video_id, max_pages=MAX_COMMENT_PAGES):
+    """Fetches top comments for a specific video ID, 100 per page, up to max_pages pages"""
     params = {
         "key": API_KEY,
         "part": "snippet",
@@ -47,41 +122,82 @@ def get_comments(video_id):
         "order": "relevance"
     }
     
+    comments = []
     try:
-        r = requests.get(COMMENTS_API_URL, params=params).json()
-        comments = []
-        if "items" in r:
-            for item in r["items"]:
-                text = item["snippet"]["topLevelComment"]["snippet"]["textDisplay"]
-                clean_text = text.replace("\n", " ").replace("\r", "")
-                comments.append(clean_text)
+        # Each page needs the previous page's token, so pages are fetched in order
+        for _ in range(max_pages):
+            r = _get_comments_page(params)
+            if "items" in r:
+                for item in r["items"]:
+                    text = item["snippet"]["topLevelComment"]["snippet"]["textDisplay"]
+                    clean_text = text.translate(_NL_TABLE)
+                    comments.append(clean_text)
+            
+            if not r.get("nextPageToken"):
+                break
+            params["pageToken"] = r["nextPageToken"]
         return " | ".join(comments)
     except Exception:
-        return ""
+        # Keep whatever pages were fetched before the error
+        return " | ".join(comments)
 
-def run_scraper():
+def get_channel_comments(channel_id, max_pages):
+    """
+    Fetches the newest comments across all of a channel's videos in one paginated stream
+    (100 per page, up to max_pages pages), instead of one request per video.
+    Returns a dict mapping video_id to its comments joined with " | ".
+    """
+    params = {
+        "key": API_KEY,
+        "part": "snippet",
+        "allThreadsRelatedToChannelId": channel_id,
+        "maxResults": 100,
+        "textFormat": "plainText",
+        "order": "time"
+    }
+    
+    comments_by_video = {}
+    try:
+        for _ in range(max_pages):
+            r = _get_comments_page(params)
+            for item in r.get("items", []):
+                snippet = item["snippet"]["topLevelComment"]["snippet"]
+                clean_text = snippet["textDisplay"].translate(_NL_TABLE)
+                comments_by_video.setdefault(snippet.get("videoId"), []).append(clean_text)
+            
+            if not r.get("nextPageToken"):
+                break
+            params["pageToken"] = r["nextPageToken"]
+    except Exception as e:
+        # Keep whatever pages were fetched before the error
+        print(f"Error fetching channel comments: {e}")
+    return {vid_id: " | ".join(comments) for vid_id, comments in comments_by_video.items()}
+
+def run_scraper(skip_video_ids=frozenset()):
     """
     Main function to scrape data. 
     Returns a list of detailed dictionaries including channel info and stats.
+    Videos in skip_video_ids (e.g., already analyzed on a previous run) are not fetched at all.
     """
     if not API_KEY:
         raise ValueError("Missing YOUTUBE_API_KEY in environment.")
 
     config = get_config()
     channel_ids = config["channel_ids"]
+    max_comment_pages = config.get("max_comment_pages", MAX_COMMENT_PAGES)
+    channel_comment_pages = config.get("channel_comment_pages", 0)
     
     all_video_data = []
 
     CHANNELS_API_URL = "https://www.googleapis.com/youtube/v3/channels"
-    PLAYLIST_API_URL = "https://www.googleapis.com/youtube/v3/playlistItems"
 
     print("--- Starting YouTube Scraper ---")
 
     for channel_id in channel_ids:
         # 1. Get Channel Details & Uploads Playlist ID
-        r = requests.get(CHANNELS_API_URL, params={
+        r = orjson.loads(SESSION.get(CHANNELS_API_URL, params={
             "key": API_KEY, "part": "contentDetails,snippet", "id": channel_id
-        }).json()
+        }, timeout=REQUEST_TIMEOUT).content)
         
         if "items" not in r:
             continue
@@ -92,42 +208,47 @@ def run_scraper():
 
         print(f"Scraping channel: {channel_name}")
 
-        # 2. Get Video IDs from Playlist
-        playlist_params = {
-            "key": API_KEY, "part": "snippet", "playlistId": uploads_id, "maxResults": 50
-        }
-        
-        r = requests.get(PLAYLIST_API_URL, params=playlist_params).json()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=COMMENT_WORKERS) as executor:
+            # 2-3. Page through the uploads playlist; each page is one videos.list batch (50 IDs), submitted
+            # as soon as it arrives so view counts and details download while later pages are still being read
+            detail_futures = []
+            for page_ids in iter_playlist_pages(uploads_id):
+                page_ids = [vid_id for vid_id in page_ids if vid_id not in skip_video_ids]
+                if page_ids:
+                    detail_futures.append(executor.submit(get_video_stats_and_details, page_ids))
+            video_details_list = [item for future in detail_futures for item in future.result()]
+            
+            # 4. Fetch comments: either one channel-wide stream, or per video concurrently
+            if not video_details_list:
+                comments_map = {}
+            elif channel_comment_pages:
+                comments_map = get_channel_comments(channel_id, channel_comment_pages)
+            else:
+                detail_ids = [item["id"] for item in video_details_list]
+                comments_map = dict(zip(detail_ids, tqdm(
+                    executor.map(get_comments, detail_ids, [max_comment_pages] * len(detail_ids)),
+                    total=len(detail_ids), desc=f"Processing {channel_name}"
+                )))
         
-        if "items" in r:
-            # Extract video IDs to fetch stats in a batch (more efficient)
-            video_ids = [item["snippet"]["resourceId"]["videoId"] for item in r["items"]]
+        for item in video_details_list:
+            vid_id = item["id"]
+            title = item["snippet"]["title"]
+            view_count = item["statistics"].get("viewCount", "0")
             
-            # 3. Fetch View Counts and Details
-            video_details_list = get_video_stats_and_details(video_ids)
+            comments = comments_map.get(vid_id, "")
             
-            for item in tqdm(video_details_list, desc=f"Processing {channel_name}"):
-                vid_id = item["id"]
-                title = item["snippet"]["title"]
-                view_count = item["statistics"].get("viewCount", "0")
-                
-                # Fetch comments
-                comments = get_comments(vid_id)
-                
-                if comments:
-                    video_info = {
-                        "video_id": vid_id,
-                        "title": title,
-                        "video_url": f"https://www.youtube.com/watch?v={vid_id}",
-                        "channel_name": channel_name,
-                        "channel_id": channel_id,
-                        "channel_url": channel_url,
-                        "views": view_count,
-                        "comments": comments
-                    }
-                    all_video_data.append(video_info)
-                
-                time.sleep(0.1) 
+            if comments:
+                video_info = {
+                    "video_id": vid_id,
+                    "title": title,
+                    "video_url": f"https://www.youtube.com/watch?v={vid_id}",
+                    "channel_name": channel_name,
+                    "channel_id": channel_id,
+                    "channel_url": channel_url,
+                    "views": view_count,
+                    "comments": comments
+                }
+                all_video_data.append(video_info)
 
     return all_video_data
 
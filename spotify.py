@@ -1,7 +1,11 @@
 import os
-import requests
-import json
+import asyncio
+import aiohttp
+import orjson
 import base64
+import re
+import sqlite3
+from collections import defaultdict
 import time
 from dotenv import load_dotenv
 
@@ -11,7 +15,65 @@ load_dotenv()
 # --- Configuration ---
 CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID")
 CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET")
-OUTPUT_FILE = "spotify_analysis_results.json"
+OUTPUT_FILE = "spotify_analysis_results.jsonl" # One JSON record per line
+
+# Searches run concurrently up to this limit; we only back off when Spotify answers 429
+MAX_CONCURRENT_REQUESTS = 8
+MAX_RETRIES = 3
+REQUEST_TIMEOUT = 10 # seconds, per request
+
+# Bracketed tags ("[Official Video]") and trailing filler ("- Lyrics", "Official Video HD") never help a match.
+# Filler words elsewhere are part of the song name ("Video Killed the Radio Star"), so only the end is trimmed.
+_BRACKET_RE = re.compile(r"\[.*?\]")
+_TRAILING_FILLER_RE = re.compile(r"(?:[\s\-|]*\b(?:official|video|lyrics|hd|4k|audio)\b)+[\s\-|]*$", re.IGNORECASE)
+_SEPARATORS = " -|"
+SEARCH_QUERY_TEMPLATE = "track:{title} artist:{artist}"
+
+# --- Search Cache ---
+# Successful lookups are persisted so re-runs don't re-query Spotify for tracks we've already found
+CACHE_FILE = ".spotify_cache.db"
+CACHE_TTL_SECONDS = 30 * 24 * 60 * 60 # 30 days
+# The OAuth token is kept in the same cache until shortly before Spotify says it expires
+TOKEN_CACHE_KEY = "__token__"
+TOKEN_EXPIRY_MARGIN = 60
+
+# Opened by run_spotify_analysis_async for the duration of a run, so importing this module
+# creates no file and no connection is inherited by forked processes.
+# All cache reads/writes happen on the run's event loop thread, so no lock is needed.
+_cache_db = None
+
+def _open_cache():
+    """Opens (and if needed creates) the cache database."""
+    global _cache_db
+    _cache_db = sqlite3.connect(CACHE_FILE)
+    _cache_db.execute("CREATE TABLE IF NOT EXISTS cache(key TEXT PRIMARY KEY, payload TEXT, ts INTEGER)")
+    _cache_db.commit()
+
+def _close_cache():
+    """Closes the cache database, if open."""
+    global _cache_db
+    if _cache_db is not None:
+        _cache_db.close()
+        _cache_db = None
+
+def _cache_get(key):
+    """Returns the cached track info for key, or None if missing, older than CACHE_TTL_SECONDS, or the cache is not open."""
+    if _cache_db is None:
+        return None
+    row = _cache_db.execute("SELECT payload, ts FROM cache WHERE key = ?", (key,)).fetchone()
+    if row and time.time() - row[1] < CACHE_TTL_SECONDS:
+        return orjson.loads(row[0])
+    return None
+
+def _cache_put(key, track_info):
+    """Stores track info for key, replacing any older entry (no-op if the cache is not open)."""
+    if _cache_db is None:
+        return
+    _cache_db.execute(
+        "INSERT OR REPLACE INTO cache(key, payload, ts) VALUES (?, ?, ?)",
+        (key, orjson.dumps(track_info).decode("utf-8"), int(time.time()))
+    )
+    _cache_db.commit()
 
 if not CLIENT_ID or not CLIENT_SECRET:
     # Set a flag to disable Spotify analysis if credentials are missing
@@ -22,10 +84,23 @@ else:
 
 # --- Spotify API Functions ---
 
-def get_spotify_token():
-    """Retrieves an access token from the Spotify API."""
+def _clean_title(song_title):
+    """
+    Clean the title: drop everything from the first "(", bracketed tags and trailing filler words,
+    then collapse whitespace and strip leftover separators. A title made only of filler
+    (e.g. "Video") is kept rather than emptied.
+    """
+    title = " ".join(_BRACKET_RE.sub(" ", (song_title or "").split("(")[0]).split())
+    return _TRAILING_FILLER_RE.sub("", title).strip(_SEPARATORS) or title.strip(_SEPARATORS)
+
+async def get_spotify_token(session):
+    """Retrieves an access token from the Spotify API, reusing the cached one while it is still valid."""
     if not SPOTIFY_ENABLED:
         return None
+    
+    cached = _cache_get(TOKEN_CACHE_KEY)
+    if cached and cached["expires_at"] > time.time():
+        return cached["access_token"]
         
     auth_url = "https://accounts.spotify.com/api/token"
     auth_string = f"{CLIENT_ID}:{CLIENT_SECRET}"
@@ -39,29 +114,41 @@ def get_spotify_token():
     data = {"grant_type": "client_credentials"}
     
     try:
-        response = requests.post(auth_url, headers=headers, data=data)
-        response.raise_for_status() # Raise exception for bad status codes
-        json_data = response.json()
-        return json_data.get("access_token")
-    except requests.exceptions.RequestException as e:
-        print(f"Error getting Spotify token: {e}")
+        async with session.post(auth_url, headers=headers, data=data) as response:
+            response.raise_for_status() # Raise exception for bad status codes
+            json_data = await response.json(loads=orjson.loads)
+        token = json_data.get("access_token")
+        if token:
+            expires_at = time.time() + json_data.get("expires_in", 3600) - TOKEN_EXPIRY_MARGIN
+            _cache_put(TOKEN_CACHE_KEY, {"access_token": token, "expires_at": expires_at})
+        return token
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        # ValueError covers an unparseable body; a failed token must not abort the Deezer half of the run
+        print(f"Error getting Spotify token: {e!r}")
         return None
 
-def search_spotify(token, song_title, channel_name):
+async def search_spotify(session, token, clean_title, channel_name):
     """
     Searches Spotify for a track by combining the video title and channel name.
+    clean_title is expected to already be normalized with _clean_title.
     """
     if not token:
         return None
         
     base_url = "https://api.spotify.com/v1/search"
     
-    # Clean the title (e.g., removing text in parentheses)
-    clean_title = song_title.split("(")[0].strip()
+    # Nothing meaningful to search for (e.g., a title that is only "(...)")
+    if not clean_title:
+        return None
     
     # Combine title and channel name into a search query string (e.g., "title artist")
     # This greatly improves accuracy over just the title.
-    search_query = f"track:{clean_title} artist:{channel_name}" # <-- USING CHANNEL NAME
+    search_query = SEARCH_QUERY_TEMPLATE.format(title=clean_title, artist=channel_name) # <-- USING CHANNEL NAME
+    
+    cache_key = f"{clean_title}||{channel_name}"
+    cached = _cache_get(cache_key)
+    if cached:
+        return cached
     
     headers = {"Authorization": f"Bearer {token}"}
     params = {
@@ -71,29 +158,46 @@ def search_spotify(token, song_title, channel_name):
     }
     
     try:
-        response = requests.get(base_url, headers=headers, params=params).json()
+        for attempt in range(MAX_RETRIES + 1):
+            async with session.get(base_url, headers=headers, params=params) as r:
+                # Rate limited: wait for the time Spotify asks for, then retry
+                if r.status == 429 and attempt < MAX_RETRIES:
+                    await asyncio.sleep(float(r.headers.get("Retry-After", 1)))
+                    continue
+                r.raise_for_status() # Error responses have no tracks; report them instead of parsing
+                response = await r.json(loads=orjson.loads)
+                break
         
         tracks = response.get("tracks", {}).get("items")
         if tracks:
             track = tracks[0]
             artist_name = track["artists"][0]["name"] if track["artists"] else "Unknown Artist"
             
-            return {
+            track_info = {
                 "spotify_id": track["id"],
                 "name": track["name"],
                 "artist": artist_name,
                 "popularity": track["popularity"],
                 "link": track["external_urls"]["spotify"]
             }
+            _cache_put(cache_key, track_info)
+            return track_info
         else:
             return None
     except Exception as e:
         print(f"Error searching Spotify for '{search_query}': {e}")
         return None
 
-def run_spotify_analysis(video_data_list):
+async def _search_with_limit(session, semaphore, token, clean_title, channel_name):
     """
-    Main function called by app.py.
+    Runs one search while holding a semaphore slot.
+    """
+    async with semaphore:
+        return await search_spotify(session, token, clean_title, channel_name)
+
+async def run_spotify_analysis_async(video_data_list):
+    """
+    Main coroutine, awaited by multiplatform_analysis.py alongside Deezer.
     Takes a list of video dicts, finds them on Spotify, and saves results.
     """
     if not SPOTIFY_ENABLED:
@@ -101,23 +205,45 @@ def run_spotify_analysis(video_data_list):
         return []
 
     print("\n--- Starting Spotify Analysis ---")
-    token = get_spotify_token()
-    if not token:
-        print("Failed to get Spotify token. Exiting Spotify analysis.")
-        return []
+
+    _open_cache()
+    try:
+        # One keep-alive connection pool sized to the concurrency limit, shared by the token and search requests
+        connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT_REQUESTS)
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            token = await get_spotify_token(session)
+            if not token:
+                print("Failed to get Spotify token. Exiting Spotify analysis.")
+                return []
+
+            # Videos with the same cleaned title and channel (reposts, re-uploads) share a single search
+            # Titles are normalized once per video and reused for grouping and reporting
+            clean_titles = [_clean_title(video.get("title")) for video in video_data_list]
+            groups = defaultdict(list)
+            for video, clean_title in zip(video_data_list, clean_titles):
+                groups[(clean_title, video.get("channel_name", ""))].append(video)
+            queries = list(groups)
+
+            # All unique searches run concurrently
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+            search_results = await asyncio.gather(*[
+                _search_with_limit(session, semaphore, token, clean_title, channel_name)
+                for clean_title, channel_name in queries
+            ])
+            track_by_query = dict(zip(queries, search_results))
+    finally:
+        _close_cache()
 
     spotify_results = []
-    # Spotify has a rate limit, a small delay is recommended
-    SLEEP_TIME = 0.5 
 
-    for video in video_data_list:
+    for video, clean_title in zip(video_data_list, clean_titles):
         title = video.get("title")
         channel_name = video.get("channel_name", "") # <-- EXTRACTING CHANNEL NAME
         
         print(f"Searching Spotify for: '{title}' by '{channel_name}'...")
+        track_info = track_by_query[(clean_title, channel_name)]
 
-        track_info = search_spotify(token, title, channel_name) # <-- PASSING CHANNEL NAME
-        
         if track_info:
             combined_entry = {
                 "youtube_video_id": video.get("video_id"),
@@ -129,19 +255,25 @@ def run_spotify_analysis(video_data_list):
             print(f" -> Found: {track_info['name']} (Popularity: {track_info['popularity']})")
         else:
             print(f" -> Not found on Spotify.")
-            
-        time.sleep(SLEEP_TIME)
 
-    # Save to JSON
+    # Save as JSON Lines: records are serialized one at a time instead of as one big indented string
     try:
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            json.dump(spotify_results, f, indent=4, ensure_ascii=False)
+        # orjson writes UTF-8 bytes directly (non-ASCII titles are kept as-is)
+        with open(OUTPUT_FILE, "wb") as f:
+            for entry in spotify_results:
+                f.write(orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE))
         print(f"\nSpotify analysis saved to {OUTPUT_FILE}")
     except Exception as e:
         print(f"Error saving Spotify results to JSON: {e}")
 
     return spotify_results
 
+def run_spotify_analysis(video_data_list):
+    """
+    Synchronous wrapper around run_spotify_analysis_async.
+    """
+    return asyncio.run(run_spotify_analysis_async(video_data_list))
+
 if __name__ == "__main__":
     # This block is for standalone testing of spotify.py
     print("Running Spotify analysis standalone test...")